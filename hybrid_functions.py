@@ -27,9 +27,15 @@ __copyright__ = """
 
 """
 
+import hashlib
+import math
+import os
+import tempfile
+import zipfile
 import numpy as np
-import scipy.optimize
+from collections import namedtuple
 from dataclasses import dataclass
+from numba import njit, prange
 
 
 @dataclass
@@ -49,12 +55,14 @@ class Pipe:
         return 0.25 * np.pi * self.d * self.d
 
 
+@njit(cache=True)
 def dyer_injector(cpres, inj_dia, lden, inj_pdrop, hl, manifold_P, vpres):
     """Models the mass flow rate of (initially liquid) n2o through a single
     injector orifice using the 2-phase model proposed by Dyer et al"""
-    inj_pdrop_og = 0
+    inj_pdrop_og = 0.0
 
-    injector = Pipe(inj_dia)
+    # Pipe can't be used in nopython mode, so work out the area directly
+    injector_A = 0.25 * np.pi * inj_dia * inj_dia
 
     if inj_pdrop < 3e5:
         print('accuracy warning: injector pdrop so low that'
@@ -70,11 +78,11 @@ def dyer_injector(cpres, inj_dia, lden, inj_pdrop, hl, manifold_P, vpres):
     # See Ref 1, page 8, Eqn 2.13
     Cd = 0.6  # Waxman et al, adapted for square edged orifices
 
-    mdot_spi = Cd * injector.A * np.sqrt(2 * lden * inj_pdrop)
+    mdot_spi = Cd * injector_A * np.sqrt(2 * lden * inj_pdrop)
 
     # mass flow rate by homogenous equilibrium model:
     # See Ref 1, page 9, Eqn 2.14
-    mdot_hem = Cd * injector.A * rho2 * np.sqrt(2 * (h2 - hl))
+    mdot_hem = Cd * injector_A * rho2 * np.sqrt(2 * (h2 - hl))
 
     if vpres < cpres:
         raise RuntimeError("injector pdrop lower than vapour pressure",
@@ -94,37 +102,154 @@ def dyer_injector(cpres, inj_dia, lden, inj_pdrop, hl, manifold_P, vpres):
     return mdot_ox
 
 
-def _lookup_index(cpres, OF):
+def _parse_propep(path):
+    """Return the chamber pressure and oxidizer percentage axes along with
+    tables of characteristic velocity and ratio of specific heats, read in a
+    single pass over the propep data file at path.
+
+    Tables are indexed by [pressure, oxidizer percentage], both ascending, so
+    they can be interpolated without touching the text again.
+    """
+    pressures, oxpcts, c_star_data, gamma_data = [], [], [], []
+    in_data = new_entry = False
+
+    with open(path) as propep_file:
+        for line in propep_file:
+            words = line.split()
+
+            if not in_data:  # skip the header
+                in_data = words == ['DATA_START']
+
+            elif words[:1] == ['****']:  # new chamber pressure block
+                pressures.append(float(words[1]) * 1e5)
+                oxpcts = []
+                c_star_data.append([])
+                gamma_data.append([])
+
+            elif len(words) == 2:  # fuel and oxidizer percentages
+                oxpcts.append(float(words[1]))
+                new_entry = True
+
+            elif len(words) == 9 and new_entry:
+                # only the first of the two performance lines is used
+                # note that propep data is in feet/s
+                # we multiply by 0.3048 to convert from fps to m/s
+                c_star_data[-1].append(float(words[4]) * 0.3048)
+                gamma_data[-1].append(float(words[1]))
+                new_entry = False
+
+    # file runs from high to low pressure and oxidizer percentage
+    order = np.argsort(pressures)
+    c_star_data = np.array(c_star_data)[order, ::-1]
+    gamma_data = np.array(gamma_data)[order, ::-1]
+
+    return (np.array(pressures)[order], np.array(oxpcts[::-1]),
+            np.ascontiguousarray(c_star_data),
+            np.ascontiguousarray(gamma_data))
+
+
+def _propep_source_key(path):
+    """Identifies the propep data file at path and the parser that reads it,
+    for checking a cached parse against"""
+    with open(path, 'rb') as propep_file:
+        digest = hashlib.sha1(propep_file.read()).hexdigest()
+
+    module = os.stat(__file__)
+    return (np.array(digest),
+            np.array([module.st_size, module.st_mtime_ns], dtype=np.int64))
+
+
+def propep_read(path):
+    """Return the propep tables for the data file at path (see _parse_propep).
+
+    The parsed tables are cached in a .npz file next to the data file, along
+    with a hash of the data file and the size and mtime of this module, and
+    the cache is only used while both still match.
+    """
+    cache = os.path.splitext(path)[0] + '.npz'
+    source_hash, module_stat = _propep_source_key(path)
+
+    try:
+        with np.load(cache) as npz:
+            if (npz['source_hash'] == source_hash
+                    and np.array_equal(npz['module_stat'], module_stat)):
+                return (npz['pressures'], npz['oxpcts'],
+                        npz['c_star_data'], npz['gamma_data'])
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        pass  # missing or unreadable cache, parse the text instead
+
+    pressures, oxpcts, c_star_data, gamma_data = _parse_propep(path)
+
+    # write to a temporary file first so an interrupted run can't leave a
+    # truncated cache behind
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            suffix='.npz', dir=os.path.dirname(cache) or '.')
+    except OSError:  # e.g. read only data directory, just parse every run
+        return pressures, oxpcts, c_star_data, gamma_data
+
+    try:
+        with os.fdopen(fd, 'wb') as cache_file:
+            np.savez(cache_file, source_hash=source_hash,
+                     module_stat=module_stat, pressures=pressures,
+                     oxpcts=oxpcts, c_star_data=c_star_data,
+                     gamma_data=gamma_data)
+        os.replace(temp_path, cache)
+    except OSError:
+        pass  # cache is optional, the tables are already parsed
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return pressures, oxpcts, c_star_data, gamma_data
+
+
+@njit(cache=True)
+def _bilinear(x_axis, y_axis, table, x, y):
+    """Bilinear interpolation of table[i, j] at (x, y), holding the edge
+    values outside the axes"""
+    i = min(max(np.searchsorted(x_axis, x) - 1, 0), len(x_axis) - 2)
+    j = min(max(np.searchsorted(y_axis, y) - 1, 0), len(y_axis) - 2)
+
+    tx = min(max((x - x_axis[i]) / (x_axis[i+1] - x_axis[i]), 0.0), 1.0)
+    ty = min(max((y - y_axis[j]) / (y_axis[j+1] - y_axis[j]), 0.0), 1.0)
+
+    return ((1 - tx) * (1 - ty) * table[i, j]
+            + tx * (1 - ty) * table[i+1, j]
+            + (1 - tx) * ty * table[i, j+1]
+            + tx * ty * table[i+1, j+1])
+
+
+@njit(cache=True)
+def _lookup_oxpct(cpres, OF):
     if not 0 <= cpres <= 90e5:
         raise RuntimeError('chamber pressure out of propep data range!')
     if not 1/39 <= OF <= 39:
         raise RuntimeError('OF out of propep data range!')
 
-    # these are ugle but just leave them as is
-    # Henry Franks tried to change these and broke everything, 24/3/21
-    rounded_cpres = int(5*round((cpres/(10**5))/5))                             
-    cpres_line = int(765*(((100-rounded_cpres)/5)-1)+9)                         
-    rounded_oxpct = (round(2*((OF/(1+OF))*100)))/2                              
-    oxpct_line = int((4*((97.5-rounded_oxpct)/0.5))+3) 
-
-    return cpres_line + oxpct_line - 1
+    return 100 * OF / (1 + OF)
 
 
-def c_star_lookup(cpres, OF, propep_data):
+@njit(cache=True)
+def c_star_lookup(cpres, OF, propep_table):
     """Looks up ratio of characteristic velocity from chamber pressure and OF
     ratio using propep data
     """
-    # note that propep data is in feet/s
-    # we multiply by 0.3048 to convert from fps to m/s
-    return float(propep_data[_lookup_index(cpres, OF)].split()[4]) * 0.3048
+    cpres_axis, oxpct_axis, c_star_data, _ = propep_table
+    return _bilinear(cpres_axis, oxpct_axis, c_star_data,
+                     cpres, _lookup_oxpct(cpres, OF))
 
 
-def gamma_lookup(cpres, OF, propep_data):
+@njit(cache=True)
+def gamma_lookup(cpres, OF, propep_table):
     """Looks up ratio of specific heats from chamber pressure and OF ratio
     using propep data"""
-    return float(propep_data[_lookup_index(cpres, OF)].split()[1])
+    cpres_axis, oxpct_axis, _, gamma_data = propep_table
+    return _bilinear(cpres_axis, oxpct_axis, gamma_data,
+                     cpres, _lookup_oxpct(cpres, OF))
 
 
+@njit(cache=True)
 def vapour_injector(inj_dia, vden, inj_pdrop):
     """Models the mass flow rate of single phase vapour-only through a single
     injector orifice"""
@@ -132,32 +257,55 @@ def vapour_injector(inj_dia, vden, inj_pdrop):
     return cd * np.pi * inj_dia*inj_dia / 4 * np.sqrt(2 * vden * inj_pdrop)
 
 
-def Z2_solve(temp1, Z1, vmass1, vmass2, gamma_n2o, zdat, pdat):
-    """Finds current compressibility factor given the initial compressibility
-    factor and the initial and current vapour masses"""
+@njit(cache=True)
+def _temp2_delta(Z2, temp1, Z1, vmass1, vmass2, gamma_n2o, zdat, pdat):
+    """Function returns difference between vapour temperature as calculated
+    by isentropic relation and that from compressibility factor data"""
+    # new vapour temperature (isentropic relation and ideal gas law)
+    temp2_isen = temp1 * pow(Z2 * vmass2 / Z1 / vmass1, gamma_n2o - 1)
 
-    def temp2_delta(Z2, Z1, vmass1, vmass2, gamma_n2o):
-        """Function returns difference between vapour temperature as calculated
-        by isentropic relation and that from compressibility factor data"""
-        # new vapour temperature (isentropic relation and ideal gas law)
-        temp2_isen = temp1 * pow(Z2 * vmass2 / Z1 / vmass1, gamma_n2o - 1)
+    # temperature corresponding to specified Z2
+    temp2_Z = temp_solve_Z(Z2, zdat, pdat)
+    delta_Z2 = temp2_isen - temp2_Z
 
-        # temperature corresponding to specified Z2
-        temp2_Z = temp_solve_Z(Z2, zdat, pdat)
-        delta_Z2 = temp2_isen - temp2_Z
+    return delta_Z2
 
-        return delta_Z2
 
-    # find Z2 at which the two calculated temperatures are equal
-    if (np.sign(temp2_delta(min(zdat), Z1, vmass1, vmass2, gamma_n2o))
-            == np.sign(temp2_delta(max(zdat), Z1, vmass1, vmass2, gamma_n2o))):
-        return 'numerical instability'
-    else:
-        Z2_solved = scipy.optimize.bisect(temp2_delta, min(zdat), max(zdat),
-                                          args=(Z1, vmass1, vmass2, gamma_n2o))
-        return Z2_solved
+@njit(cache=True)
+def Z2_solve(temp1, Z1, vmass1, vmass2, gamma_n2o, zdat, pdat):
+    """Finds current compressibility factor given the initial compressibility
+    factor and the initial and current vapour masses.
 
+    Returns NaN if there is no solution within the compressibility data,
+    which happens once the vapour is depleted.
+    """
+    Z_min, Z_max = zdat.min(), zdat.max()
 
+    # find Z2 at which the two calculated temperatures are equal
+    delta_min = _temp2_delta(Z_min, temp1, Z1, vmass1, vmass2, gamma_n2o,
+                             zdat, pdat)
+    delta_max = _temp2_delta(Z_max, temp1, Z1, vmass1, vmass2, gamma_n2o,
+                             zdat, pdat)
+
+    if np.sign(delta_min) == np.sign(delta_max):
+        return np.nan
+
+    # bisection, following scipy.optimize.bisect
+    dZ = Z_max - Z_min
+    for _ in range(100):
+        dZ *= 0.5
+        Z2 = Z_min + dZ
+        delta = _temp2_delta(Z2, temp1, Z1, vmass1, vmass2, gamma_n2o,
+                             zdat, pdat)
+        if delta * delta_min >= 0:
+            Z_min = Z2
+        if delta == 0 or abs(dZ) < 2e-12 + 8.88e-16 * abs(Z2):
+            break
+
+    return Z2
+
+
+@njit(cache=True)
 def ball_valve_K(Re, d1, d2, L):
     """Returns full-bore ball valve flow coefficient as a thick orifice"""
     rd_2 = d2 * d2 / d1 / d1  # square of the diameter ratio
@@ -172,12 +320,14 @@ def ball_valve_K(Re, d1, d2, L):
     return K
 
 
+@njit(cache=True)
 def Nikuradse(Re):
     """Returns the friction factor, f, for a given Reynolds number, fitting the
     Nikuradse model"""
     return 0.0076 * pow(3170/Re, 0.165) / (1 + pow(3170/Re, 7)) + 16/Re
 
 
+@njit(cache=True)
 def thermophys(temp):
     """Get N2O data at a given temperature.
     Uses polynomials from ESDU sheet 91022. All units SI.
@@ -229,58 +379,470 @@ def thermophys(temp):
     return (lden, vden, hl, hg, c, vpres, ldynvis)
 
 
-def temp_solve_P(P):
-    """Returns the temperature given the vapour pressure. Second argument is an
-    initial guess temperature for Newton raphson solver"""
-    # define difference between vapour pressure as a function of temperature
-    # and the given pressure(ESDU 91022)
-    def vpres_delta(temp, P):
-        vpres_delta = ((7251000*(np.e**((1/(temp/309.57))*(-6.71893*(1-(temp/309.57))
-                       +1.35966*((1-(temp/309.57))**(3/2))+-1.3779*((1-(temp/309.57))**(5/2))
-                       +-4.051*(1-(temp/309.57))**5))))-P)
-        return vpres_delta
-    # solve for given pressure
-    temp_solve = scipy.optimize.bisect(vpres_delta, 183.15, 309.57, args=tuple([P]))
-    return temp_solve
+# thermophys tabulated every 0.05 K for fast lookups, stopping just short of
+# the critical point where the heat capacity polynomial blows up
+_THERMO_TEMPS = np.linspace(183.15, 309.5, 2528)
+_THERMO_TABLE = np.ascontiguousarray(
+    np.array([thermophys(T) for T in _THERMO_TEMPS]).T)
+
 
+@njit(cache=True)
+def thermophys_fast(temp):
+    """Get N2O data at a given temperature by interpolating the thermophys
+    table. Returns the same properties, in the same order, as thermophys."""
 
+    if not _THERMO_TEMPS[0] <= temp <= _THERMO_TEMPS[-1]:
+        raise ValueError('nitrous oxide temperature out of data range')
+
+    return (np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[0]),
+            np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[1]),
+            np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[2]),
+            np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[3]),
+            np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[4]),
+            np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[5]),
+            np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[6]))
+
+
+@njit(cache=True)
+def temp_solve_P_fast(P):
+    """Returns the temperature given the vapour pressure, from the thermophys
+    table rather than by numerical solution"""
+    vpres_table = _THERMO_TABLE[5]
+
+    if not vpres_table[0] <= P <= vpres_table[-1]:
+        raise ValueError('vapour pressure out of data range')
+
+    # vapour pressure rises monotonically with temperature, so the table
+    # can be inverted directly instead of solving for temperature
+    return np.interp(P, vpres_table, _THERMO_TEMPS)
+
+
+@njit(cache=True)
 def chamber_vap(P):
-    """Returns N2O specific enthalpy of vapour and vapour density at chambe
-    pressure, again, 2nd argument is guess of vapour temperature"""
-    temp = temp_solve_P(P)
-    hg, vden = thermophys(temp)[3], thermophys(temp)[1]
+    """Returns N2O specific enthalpy of vapour and vapour density at chamber
+    pressure"""
+    temp = temp_solve_P_fast(P)
+    hg = np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[3])
+    vden = np.interp(temp, _THERMO_TEMPS, _THERMO_TABLE[1])
     return (hg, vden)
 
 
 def compressibility_read(compressibility_data):
-    """Return lists of pressure and compressibility factors from csv file"""
+    """Return arrays of pressure and compressibility factors from csv file.
+
+    The arrays are contiguous float64 so np.interp can use them as they are.
+    """
     pdat, zdat = [], []
     next(compressibility_data)
     next(compressibility_data)
     for row in compressibility_data:
         pdat.append(float(row[0]))
         zdat.append(float(row[1]))
-    return pdat, zdat
+    return (np.ascontiguousarray(pdat, dtype=np.float64),
+            np.ascontiguousarray(zdat, dtype=np.float64))
 
 
+@njit(cache=True)
 def temp_solve_Z(Z, zdat, pdat):
     """Returns the temperature given the compressibility factor"""
     P = np.interp(Z, zdat[::-1], pdat[::-1])
-    return temp_solve_P(P)
+    return temp_solve_P_fast(P)
 
 
+@njit(cache=True)
+def _mach_error(m, gamma, NOZZLE_AREA_RATIO):
+    """Finds the discrepancy between the non-dimensional mass flow
+    rate (stagnation) found using Mach number relations and that
+    calculated using current guess of exit conditions"""
+    m_new = np.power(
+        2 / (gamma + 1) * (1 + (gamma - 1) * m * m / 2),
+        (gamma + 1) / (gamma - 1) / 2
+    ) / NOZZLE_AREA_RATIO
+    return m - m_new
+
+
+@njit(cache=True)
 def mach_exit(gamma, NOZZLE_AREA_RATIO):
-    """Returns the exit mach number by numerical solution"""
-
-    def mach_error(m):
-        """Finds the discrepancy between the non-dimensional mass flow
-        rate (stagnation) found using Mach number relations and that
-        calculated using current guess of exit conditions"""
-        m_new = np.power(
-            2 / (gamma + 1) * (1 + (gamma - 1) * m * m / 2),
-            (gamma + 1) / (gamma - 1) / 2
-        ) / NOZZLE_AREA_RATIO
-        return abs(m - m_new)
-
-    return float(
-            scipy.optimize.minimize(mach_error, 4, tol=1e-9, method='Powell').x)
+    """Returns the (supersonic) exit mach number by numerical solution"""
+    # the error is positive at m = 1 and negative once m is large enough
+    m_min, m_max = 1.0, 2.0
+    while _mach_error(m_max, gamma, NOZZLE_AREA_RATIO) > 0:
+        m_min, m_max = m_max, 2 * m_max
+
+    # bisect between them
+    while m_max - m_min > 1e-12:
+        m = 0.5 * (m_min + m_max)
+        if _mach_error(m, gamma, NOZZLE_AREA_RATIO) > 0:
+            m_min = m
+        else:
+            m_max = m
+
+    return 0.5 * (m_min + m_max)
+
+
+def mach_exit_table(propep_table, NOZZLE_AREA_RATIO, n=701):
+    """Returns the exit mach number tabulated against gamma, for use with
+    np.interp in place of solving mach_exit every step.
+
+    The table spans the gamma values in the propep data, and gamma_lookup
+    interpolates between those, so it never needs extrapolating.
+    """
+    gamma_data = propep_table[3]
+    gamma_axis = np.linspace(gamma_data.min(), gamma_data.max(), n)
+    mach_axis = np.array([mach_exit(gamma, NOZZLE_AREA_RATIO)
+                          for gamma in gamma_axis])
+
+    return gamma_axis, mach_axis
+
+
+# blowdown phases
+LIQUID = 0
+VAPOUR = 1
+
+# valve models, selected by VALVE_MODEL_TYPE
+VALVE_MODELS = {'ball': 0, 'kv': 1}
+VALVE_BALL = VALVE_MODELS['ball']
+VALVE_KV = VALVE_MODELS['kv']
+
+# step status codes
+RUNNING = 0
+LIQUID_DEPLETED = 1
+REVERSE_FLOW = 2
+VAPOUR_DEPLETED = 3
+FUEL_DEPLETED = 4
+STEP_ERROR = 5  # step raised, reported by simulate rather than raised
+
+# evolving tank, grain and chamber quantities, advanced by step
+State = namedtuple('State', [
+    'temp', 'lmass', 'vmass', 'tmass', 'port_d', 'port_A', 'pres_cham',
+    'vapz_lag', 'mdotox', 'lden', 'vden', 'hl', 'hv', 'cp', 'vap_pres',
+    'ldynvis', 'blowdown',
+    # tank conditions at liquid depletion, for the vapour blowdown
+    'vmass_ld', 'temp_ld', 'vden_ld', 'vap_pres_ld', 'Z_ld'])
+
+# everything that stays fixed for the duration of the firing, the data
+# tables are kept flat as the parallel sweep can't capture nested tuples
+Params = namedtuple('Params', [
+    'dt', 'vol_tank', 'num_inj', 'dia_inj', 'feed_A', 'feed_d', 'feed_l',
+    'valve_d', 'valve_l', 'valve_model', 'kv_valve', 'reg_coeff', 'reg_exp',
+    'density_fuel', 'port_l', 'fuel_d', 'fuel_A', 'throat_A',
+    'c_star_efficiency', 'nozzle_efficiency', 'nozzle_area_ratio',
+    'pres_external', 'gamma_N2O', 'pdat', 'zdat',
+    # propep_read tables
+    'cpres_axis', 'oxpct_axis', 'c_star_data', 'gamma_data',
+    # mach_exit_table
+    'gamma_axis', 'mach_axis'])
+
+# performance outputs of a single step
+Outputs = namedtuple('Outputs', [
+    'status', 'manifold_pres', 'inj_pdrop', 'gox', 'thrust', 'pres_exit',
+    'gamma', 'OF', 'rdot', 'fuel_mass'])
+
+
+@njit(cache=True)
+def step(time, state, params):
+    """Advance the motor by a single time step.
+
+    state is a State holding the evolving tank, grain and chamber quantities,
+    params is a Params holding everything that stays fixed for the duration
+    of the firing. Returns the updated State along with the Outputs (status
+    code and performance) for this step.
+    """
+    # both unpacked in field order
+    (temp, lmass, vmass, tmass, port_d, port_A, pres_cham, vapz_lag, mdotox,
+     lden, vden, hl, hv, cp, vap_pres, ldynvis, blowdown,
+     vmass_ld, temp_ld, vden_ld, vap_pres_ld, Z_ld) = state
+
+    (dt, vol_tank, num_inj, dia_inj, feed_A, feed_d, feed_l, valve_d, valve_l,
+     valve_model, kv_valve, reg_coeff, reg_exp, density_fuel, port_l,
+     fuel_d, fuel_A, throat_A, c_star_efficiency, nozzle_efficiency,
+     nozzle_area_ratio, pres_external, gamma_N2O, pdat, zdat,
+     cpres_axis, oxpct_axis, c_star_data, gamma_data,
+     gamma_axis, mach_axis) = params
+
+    propep_table = (cpres_axis, oxpct_axis, c_star_data, gamma_data)
+
+    status = RUNNING
+    manifold_pres = inj_pdrop = gox = thrust = pres_exit = 0.0
+    gamma = OF = rdot = fuel_mass = 0.0
+
+    # calculate feed system losses (only attemped for liquid phase), these
+    # are negligible until the flow gets going so skip them below 1 cm/s
+    flow_speed = mdotox / (lden * feed_A)
+
+    if flow_speed > 0.01 and lmass > 0:
+        entry_loss = 0.5 * lden * (flow_speed ** 2)  # loss at tank entry
+
+        reynolds = lden * flow_speed * feed_d / ldynvis
+        f = Nikuradse(reynolds)
+
+        # loss in pipe
+        vis_pdrop = 0.25 * f * lden * (flow_speed**2) * feed_l / feed_d
+
+        if valve_model == VALVE_BALL:
+            #valve loss from full bore ball valve modelled as thick orifice
+            valve_loss = (0.5 * lden * flow_speed * flow_speed
+                          * ball_valve_K(reynolds, feed_d, valve_d,
+                                               valve_l))
+
+        elif valve_model == VALVE_KV:
+            valve_loss = (1.296e9 * mdotox * mdotox /
+                          (lden * kv_valve * kv_valve))
+
+        # sum pressure drops
+        manifold_pres = vap_pres - entry_loss - valve_loss - vis_pdrop
+    else:
+        manifold_pres = vap_pres
+
+
+    #calculate injector pressure drop
+    inj_pdrop = manifold_pres - pres_cham
+
+    if inj_pdrop < 0.15 and time > 0.5:
+        status = REVERSE_FLOW
+
+    # model tank emptying
+
+    elif blowdown == LIQUID:
+        # liquid phase blowdown
+
+        mdotox = num_inj * dyer_injector(
+            pres_cham, dia_inj, lden, inj_pdrop,
+            hl, manifold_pres, vap_pres
+        )
+
+        # find new mass of tank contents after outflow
+        tmass -= mdotox * dt
+
+        # liquid mass prior to vaporization
+        lmass_pre_vap = lmass - (mdotox * dt)
+
+        # lmass post vaporization
+        lmass_post_vap = (vden * vol_tank - tmass) / (vden / lden - 1)
+
+        if lmass_pre_vap < lmass_post_vap:  # check for liquid depletion
+            status = LIQUID_DEPLETED
+
+            blowdown = VAPOUR
+            lmass = 0
+            vmass = tmass
+
+            # define tank parameters at liquid depletion
+            vmass_ld, temp_ld, vden_ld, vap_pres_ld = (vmass, temp,
+                                                       vden, vap_pres)
+
+            Z_ld = np.interp(thermophys_fast(temp_ld)[5], pdat, zdat)
+
+        else:  # continue with liquid blowdown stage
+            lmass = lmass_post_vap
+            vapz = lmass_pre_vap - lmass  # mass vapourized
+
+            # add 1st order lag of 0.15s to model vaporization time
+            vapz_lag = dt / 0.15 * (vapz - vapz_lag) + vapz_lag
+            vmass = tmass - lmass
+
+            # update nitrous thermophysical properties given new temperature
+            temp -= vapz_lag * hv / lmass / cp
+            lden, vden, hl, hg, cp, vap_pres, ldynvis = (
+                thermophys_fast(temp))
+            hv = hg - hl  # spec heat of vapourization
+
+    else:
+        # vapour phase blowdown
+
+        # calculations for injector orifices
+        mdotox = num_inj * vapour_injector(dia_inj, vden, inj_pdrop)
+        vmass -= dt * mdotox  # sum flow from 3 types of orifice
+
+        # find current tank vapour parameters
+        Z2 = Z2_solve(temp_ld, Z_ld, vmass_ld, vmass, gamma_N2O,
+                            zdat, pdat)
+
+        if np.isnan(Z2):
+            status = VAPOUR_DEPLETED
+
+        else:
+            #isentropic assumption
+            temp = temp_ld * pow(Z2 * vmass / (Z_ld * vmass_ld),
+                                 gamma_N2O-1)
+            vap_pres = vap_pres_ld * pow(temp / temp_ld,
+                                         gamma_N2O / (gamma_N2O-1))
+            vden = vden_ld * pow(temp / temp_ld, 1 / (gamma_N2O-1))
+
+    if status == RUNNING or status == LIQUID_DEPLETED:
+        # oxidizer mass flux, checked against its limit by the caller
+        gox = mdotox / port_A
+
+        # fuel port calculation
+        rdot = reg_coeff * pow(mdotox/port_A, reg_exp)
+        mdotfuel = rdot * density_fuel * math.pi * port_d * port_l
+
+        port_d += 2*rdot*dt
+        port_A = 0.25 * math.pi * port_d * port_d
+
+        if port_d > fuel_d: #check for depleted fuel grain
+            status = FUEL_DEPLETED
+
+        else:
+            fuel_mass = (fuel_A - port_A) * port_l * density_fuel
+            OF = mdotox / mdotfuel
+
+            # lookup characteristic velocity using previous
+            # pres_cham and current OF from propep data
+            c_star = (c_star_lookup(pres_cham, OF, propep_table)
+                      * c_star_efficiency)
+
+            # calculate current chamber pressure
+            pres_cham = (mdotox + mdotfuel) * c_star / throat_A
+
+            # lookup ratio of specific heats from propep data file
+            gamma = gamma_lookup(pres_cham, OF, propep_table)
+
+
+            # performance calculations
+            gm1 = gamma - 1.0
+            gp1 = gamma + 1.0
+
+            # find nozzle exit static pressure
+            exit_mach = np.interp(gamma, gamma_axis, mach_axis)
+            pres_exit = pres_cham * math.pow(
+                1.0 + 0.5 * gm1 * exit_mach * exit_mach, -gamma / gm1)
+
+
+            # motor performance calculations
+            t1 = math.pow(2.0 / gp1, gp1 / gm1)
+            t2 = 1.0 - math.pow(pres_exit / pres_cham, gm1 / gamma)
+
+            thrust = nozzle_efficiency * (
+                throat_A * pres_cham * math.sqrt(
+                    2.0 * gamma * gamma / gm1 * t1 * t2)
+                + (pres_exit - pres_external) * throat_A * nozzle_area_ratio)
+
+    state = State(temp, lmass, vmass, tmass, port_d, port_A, pres_cham,
+                  vapz_lag, mdotox, lden, vden, hl, hv, cp, vap_pres, ldynvis,
+                  blowdown, vmass_ld, temp_ld, vden_ld, vap_pres_ld, Z_ld)
+
+    return state, Outputs(status, manifold_pres, inj_pdrop, gox, thrust,
+                          pres_exit, gamma, OF, rdot, fuel_mass)
+
+
+@njit(cache=True)
+def simulate(state, params):
+    """Run step from the given initial State until the firing ends.
+
+    Returns a summary of the firing: burn time, total impulse, peak thrust,
+    mean Isp, minimum injector pressure margin (as a fraction of chamber
+    pressure) and the status code that ended it. If a step raises, e.g. the
+    design takes the chamber pressure or tank temperature out of the data
+    range, the status is STEP_ERROR and the rest of the summary is NaN.
+    """
+    dt = params.dt
+
+    time, impulse, peak_thrust, margin = 0.0, 0.0, 0.0, np.inf
+    prop_mass = fuel_mass = np.nan
+
+    while True:
+        time += dt
+
+        # exceptions can't be passed on out of sweep's parallel loop
+        try:
+            state, outputs = step(time, state, params)
+        except Exception:
+            status = STEP_ERROR
+            break
+
+        status = outputs.status
+
+        if (status == REVERSE_FLOW or status == VAPOUR_DEPLETED
+                or status == FUEL_DEPLETED):
+            break
+
+        # mean Isp is taken against the propellant mass after the first
+        # step, the same as motor_sim.py does
+        if np.isnan(prop_mass):
+            prop_mass = state.lmass + state.vmass + outputs.fuel_mass
+        fuel_mass = outputs.fuel_mass
+
+        impulse += outputs.thrust * dt
+        peak_thrust = max(peak_thrust, outputs.thrust)
+        margin = min(margin, (outputs.manifold_pres - state.pres_cham)
+                     / state.pres_cham)
+
+    if status == STEP_ERROR:
+        return np.nan, np.nan, np.nan, np.nan, np.nan, status
+
+    isp = impulse / (prop_mass - fuel_mass) / 9.81
+
+    return time - dt, impulse, peak_thrust, isp, margin, status
+
+
+# columns of the designs array taken by sweep
+SWEEP_COLUMNS = ('NUM_INJ', 'DIA_INJ', 'DIA_PORT', 'LENGTH_PORT', 'DIA_THROAT')
+
+
+@njit(cache=True)
+def _with_design(state, params, num_inj, dia_inj, dia_port, length_port,
+                 dia_throat):
+    """Returns copies of state and params with the SWEEP_COLUMNS inputs
+    replaced"""
+    port_A = 0.25 * math.pi * dia_port * dia_port
+    throat_A = 0.25 * math.pi * dia_throat * dia_throat
+
+    # namedtuple._replace isn't supported in nopython mode
+    state = State(
+        temp=state.temp, lmass=state.lmass, vmass=state.vmass,
+        tmass=state.tmass, port_d=dia_port, port_A=port_A,
+        pres_cham=state.pres_cham, vapz_lag=state.vapz_lag,
+        mdotox=state.mdotox, lden=state.lden, vden=state.vden, hl=state.hl,
+        hv=state.hv, cp=state.cp, vap_pres=state.vap_pres,
+        ldynvis=state.ldynvis, blowdown=state.blowdown,
+        vmass_ld=state.vmass_ld, temp_ld=state.temp_ld,
+        vden_ld=state.vden_ld, vap_pres_ld=state.vap_pres_ld,
+        Z_ld=state.Z_ld)
+
+    params = Params(
+        dt=params.dt, vol_tank=params.vol_tank, num_inj=num_inj,
+        dia_inj=dia_inj, feed_A=params.feed_A, feed_d=params.feed_d,
+        feed_l=params.feed_l, valve_d=params.valve_d,
+        valve_l=params.valve_l, valve_model=params.valve_model,
+        kv_valve=params.kv_valve, reg_coeff=params.reg_coeff,
+        reg_exp=params.reg_exp, density_fuel=params.density_fuel,
+        port_l=length_port, fuel_d=params.fuel_d, fuel_A=params.fuel_A,
+        throat_A=throat_A, c_star_efficiency=params.c_star_efficiency,
+        nozzle_efficiency=params.nozzle_efficiency,
+        nozzle_area_ratio=params.nozzle_area_ratio,
+        pres_external=params.pres_external, gamma_N2O=params.gamma_N2O,
+        pdat=params.pdat, zdat=params.zdat, cpres_axis=params.cpres_axis,
+        oxpct_axis=params.oxpct_axis, c_star_data=params.c_star_data,
+        gamma_data=params.gamma_data, gamma_axis=params.gamma_axis,
+        mach_axis=params.mach_axis)
+
+    return state, params
+
+
+@njit(parallel=True, cache=True)
+def sweep(designs, state, params):
+    """Simulates a batch of motor designs in parallel.
+
+    Each row of designs holds the SWEEP_COLUMNS inputs for one motor, all
+    other inputs come from the baseline initial State and Params (as built
+    in motor_sim.setup). Returns one row of the simulate summary per design.
+    """
+    summary = np.full((designs.shape[0], 6), np.nan)
+
+    for k in prange(designs.shape[0]):
+        design_state, design_params = _with_design(
+            state, params, designs[k, 0], designs[k, 1], designs[k, 2],
+            designs[k, 3], designs[k, 4])
+
+        (burn_time, impulse, peak_thrust, isp, margin,
+         status) = simulate(design_state, design_params)
+
+        summary[k, 0] = burn_time
+        summary[k, 1] = impulse
+        summary[k, 2] = peak_thrust
+        summary[k, 3] = isp
+        summary[k, 4] = margin
+        summary[k, 5] = status
+
+    return summary
@@ -61,83 +61,114 @@ REG_EXP = 0.331		          # regression rate exponent (usually 'n' in
                               #                           textbooks)
 
 PRES_EXTERNAL = 101325        # external atmospheric pressure at test site (Pa)
-temp = 25 + 273.15            # initial tank temperature (K)
-
-
+TEMP_TANK = 25 + 273.15       # initial tank temperature (K)
+
+
+def setup():
+    """Returns the initial State and Params of the motor described by the
+    input parameters above"""
+
+    # Create pipes for pipe-like things
+    port   = motor.Pipe(DIA_PORT, LENGTH_PORT)
+    fuel   = motor.Pipe(DIA_FUEL)
+    throat = motor.Pipe(DIA_THROAT)
+    feed   = motor.Pipe(DIA_FEED, LENGTH_FEED)
+    valve  = motor.Pipe(DIA_VALVE, LENGTH_VALVE)
+
+    # flatten them into plain floats for the simulation step
+    port_d, port_l, port_A = port.d, port.l, port.A
+    fuel_d, fuel_A         = fuel.d, fuel.A
+    throat_A               = throat.A
+    feed_d, feed_l, feed_A = feed.d, feed.l, feed.A
+    valve_d, valve_l       = valve.d, valve.l
+
+    dt = 1e-2  # time step (s)
+
+    #read propep data file
+    propep_table = motor.propep_read('data/L_Nitrous_S_HDPE.propep')
+
+    #open compressibility_data csv file
+    with open('data/n2o_compressibility_factors.csv') as csvfile:
+        compressibility_data = csv.reader(csvfile)
+        pdat, zdat = motor.compressibility_read(compressibility_data)
+
+    # assign initial values
+    gamma_N2O = 1.31
+
+    # temperature dependent properties
+    temp = TEMP_TANK
+    lden, vden, hl, hg, cp, vap_pres, ldynvis = motor.thermophys(temp)
+
+    hv = hg - hl # spec heat of vapourization
+
+    #calculate initial propellant masses
+    lmass = VOL_TANK * (1 - HEAD_SPACE) * lden
+    vmass = VOL_TANK * HEAD_SPACE * vden
+    tmass = lmass + vmass
+
+    state = motor.State(
+        temp=temp, lmass=lmass, vmass=vmass, tmass=tmass, port_d=port_d,
+        port_A=port_A, pres_cham=float(PRES_EXTERNAL), vapz_lag=0.0,
+        mdotox=0.0, lden=lden, vden=vden, hl=hl, hv=hv, cp=cp,
+        vap_pres=vap_pres, ldynvis=ldynvis, blowdown=motor.LIQUID,
+        # set at liquid depletion
+        vmass_ld=0.0, temp_ld=0.0, vden_ld=0.0, vap_pres_ld=0.0, Z_ld=0.0)
+
+    cpres_axis, oxpct_axis, c_star_data, gamma_data = propep_table
+    gamma_axis, mach_axis = motor.mach_exit_table(propep_table,
+                                                  NOZZLE_AREA_RATIO)
+
+    params = motor.Params(
+        dt=dt, vol_tank=VOL_TANK, num_inj=NUM_INJ, dia_inj=DIA_INJ,
+        feed_A=feed_A, feed_d=feed_d, feed_l=feed_l, valve_d=valve_d,
+        valve_l=valve_l, valve_model=motor.VALVE_MODELS[VALVE_MODEL_TYPE],
+        kv_valve=KV_VALVE, reg_coeff=REG_COEFF, reg_exp=REG_EXP,
+        density_fuel=DENSITY_FUEL, port_l=port_l, fuel_d=fuel_d,
+        fuel_A=fuel_A, throat_A=throat_A,
+        c_star_efficiency=C_STAR_EFFICIENCY,
+        nozzle_efficiency=NOZZLE_EFFICIENCY,
+        nozzle_area_ratio=NOZZLE_AREA_RATIO, pres_external=PRES_EXTERNAL,
+        gamma_N2O=gamma_N2O, pdat=pdat, zdat=zdat, cpres_axis=cpres_axis,
+        oxpct_axis=oxpct_axis, c_star_data=c_star_data,
+        gamma_data=gamma_data, gamma_axis=gamma_axis, mach_axis=mach_axis)
+
+    return state, params
+
+
+def main():
+    # bind everything the loop uses every dt as locals
+    step = motor.step
+    liquid_depleted, reverse_flow = motor.LIQUID_DEPLETED, motor.REVERSE_FLOW
+    vapour_depleted, fuel_depleted = (motor.VAPOUR_DEPLETED,
+                                      motor.FUEL_DEPLETED)
+    dia_throat, nozzle_efficiency = DIA_THROAT, NOZZLE_EFFICIENCY
+    nozzle_area_ratio = NOZZLE_AREA_RATIO
+
+    ###########################################################################
+    # Initialize simulation
+    ###########################################################################
+
+    if 'dracula' in plt.style.available:
+        plt.style.use('dracula')
+    else:
+        plt.style.use('seaborn-whitegrid')
 
-# Create pipes for pipe-like things
-port   = motor.Pipe(DIA_PORT, LENGTH_PORT)
-fuel   = motor.Pipe(DIA_FUEL)
-throat = motor.Pipe(DIA_THROAT)
-feed   = motor.Pipe(DIA_FEED, LENGTH_FEED)
-valve  = motor.Pipe(DIA_VALVE, LENGTH_VALVE)
+    state, params = setup()
+    dt = params.dt
 
+    # assign initial values
+    time = 0.0
+    temp, lmass, vmass = state.temp, state.lmass, state.vmass
+    vap_pres, pres_cham = state.vap_pres, state.pres_cham
+    fuel_mass = (params.fuel_A - state.port_A) * params.port_l * DENSITY_FUEL
 
-###############################################################################
-# Initialize simulation
-###############################################################################
+    # preallocate output data, one row per quantity (see the end of the
+    # simulation loop for the order), grown if the burn runs past 30 s
+    output_data = np.empty((20, int(30.0 / dt) + 16))
+    i = 0
 
-if 'dracula' in plt.style.available:
-    plt.style.use('dracula')
-else:
-    plt.style.use('seaborn-whitegrid')
-
-dt = 1e-2  # time step (s)
-
-#open propep data file
-propep_file = open('data/L_Nitrous_S_HDPE.propep', 'r')
-propep_data = propep_file.readlines()
-
-#open compressibility_data csv file
-with open('data/n2o_compressibility_factors.csv') as csvfile:
-    compressibility_data = csv.reader(csvfile)
-    pdat, zdat = motor.compressibility_read(compressibility_data)
-
-# assign initial values
-vapz_lag = 0
-time = 0
-mdotox = 0
-impulse = 0
-gamma_N2O = 1.31
-blowdown_type = 'liquid'
-
-# temperature dependent properties
-lden, vden, hl, hg, cp, vap_pres, ldynvis = motor.thermophys(temp)
-
-hv = hg - hl # spec heat of vapourization
-pres_cham = PRES_EXTERNAL
-
-#calculate initial propellant masses
-lmass = VOL_TANK * (1 - HEAD_SPACE) * lden
-vmass = VOL_TANK * HEAD_SPACE * vden
-fuel_mass = (fuel.A - port.A) * port.l * DENSITY_FUEL
-tmass = lmass + vmass
-
-(  # create empty lists to fill with output data
-    time_data,
-    vap_pres_data,
-    pres_cham_data,
-    thrust_data,
-    gox_data,
-    prop_mass_data,
-    manifold_pres_data,
-    gamma_data,
-    throat_data,
-    nozzle_efficiency_data,
-    exit_pressure_data,
-    area_ratio_data,
-    of_data,
-    regression_data,
-    port_diameter_data,
-
-    # additional properties needed for the 6DOF simulation
-    vden_data, vmass_data,
-    lden_data, lmass_data,
-    fuel_mass_data
-) = [[] for _ in range(20)]
-
-# print initial conditions
-print(f"""
+    # print initial conditions
+    print(f"""
 Initial conditions:
     time: {time:.4f} s
     tank temperature: {temp-273.15:.2f} C
@@ -148,310 +179,216 @@ Initial conditions:
     fuel mass {fuel_mass:.4f} kg
 """)
 
-###############################################################################
-# Simulation loop
-###############################################################################
-
-while True:
-    time += dt  # increment time
-
-    # calculate feed system losses (only attemped for liquid phase)
-    if mdotox > 0 and lmass > 0:
-        flow_speed = mdotox / (lden * feed.A)
-        entry_loss = 0.5 * lden * (flow_speed ** 2)  # loss at tank entry
-
-        reynolds = lden * flow_speed * feed.d / ldynvis
-        f = motor.Nikuradse(reynolds)
-
-        # loss in pipe
-        vis_pdrop = 0.25 * f * lden * (flow_speed**2) * feed.l / feed.d
-
-        if VALVE_MODEL_TYPE == 'ball':
-            #valve loss from full bore ball valve modelled as thick orifice
-            valve_loss = (0.5 * lden * flow_speed * flow_speed
-                          * motor.ball_valve_K(reynolds, feed.d, valve.d,
-                                               valve.l))
-
-        elif VALVE_MODEL_TYPE == 'kv':
-            valve_loss = (1.296e9 * mdotox * mdotox /
-                          (lden * KV_VALVE * KV_VALVE))
-
-        # sum pressure drops
-        manifold_pres = vap_pres - entry_loss - valve_loss - vis_pdrop
-    else:
-        manifold_pres = vap_pres
-
+    ###########################################################################
+    # Simulation loop
+    ###########################################################################
 
-    #calculate injector pressure drop
-    inj_pdrop = manifold_pres - pres_cham
+    while True:
+        time += dt  # increment time
 
-    if inj_pdrop < 0.15 and time > 0.5:
-        print(f'FAILURE: Reverse flow occurred at t={time} s')
-        break
+        state, outputs = step(time, state, params)
+        status, gox = outputs.status, outputs.gox
 
-    # model tank emptying
-
-    if blowdown_type == 'liquid':
-        # liquid phase blowdown
-
-        mdotox = NUM_INJ * motor.dyer_injector(
-            pres_cham, DIA_INJ, lden, inj_pdrop,
-            hl, manifold_pres, vap_pres
-        )
-
-        # find new mass of tank contents after outflow
-        tmass -= mdotox * dt
-
-        # liquid mass prior to vaporization
-        lmass_pre_vap = lmass - (mdotox * dt)
-
-        # lmass post vaporization
-        lmass_post_vap = (vden * VOL_TANK - tmass) / (vden / lden - 1)
-
-        if lmass_pre_vap < lmass_post_vap:  # check for liquid depletion
-            print(f'starting vapour blowdown, vapour mass is {vmass+lmass:.4f} kg')
+        if status == liquid_depleted:
+            print(f'starting vapour blowdown, vapour mass is '
+                  f'{vmass+lmass:.4f} kg')
             print(f'injector pressure drop at liquid depletion was '
-                  f'{100 * inj_pdrop / pres_cham:.4f}%')
-
-            blowdown_type = 'vapour'
-            lmass = 0
-            vmass = tmass
+                  f'{100 * outputs.inj_pdrop / pres_cham:.4f}%')
 
-            # define tank parameters at liquid depletion
-            vmass_ld, temp_ld, vden_ld, vap_pres_ld = (vmass, temp,
-                                                       vden, vap_pres)
+        temp, lmass, vmass = state.temp, state.lmass, state.vmass
+        lden, vden, vap_pres = state.lden, state.vden, state.vap_pres
+        port_d, pres_cham = state.port_d, state.pres_cham
 
-            Z_ld = np.interp(motor.thermophys(temp_ld)[5], pdat, zdat)
-
-        else:  # continue with liquid blowdown stage
-            lmass = lmass_post_vap
-            vapz = lmass_pre_vap - lmass  # mass vapourized
-
-            # add 1st order lag of 0.15s to model vaporization time
-            vapz_lag = dt / 0.15 * (vapz - vapz_lag) + vapz_lag
-            vmass = tmass - lmass
-
-            # update nitrous thermophysical properties given new temperature
-            temp -= vapz_lag * hv / lmass / cp
-            lden, vden, hl, hg, cp, vap_pres, ldynvis = motor.thermophys(temp)
-            hv = hg - hl  # spec heat of vapourization
-
-    else:
-        # vapour phase blowdown
-
-        # calculations for injector orifices
-        mdotox = NUM_INJ * motor.vapour_injector(DIA_INJ, vden, inj_pdrop)
-        vmass -= dt * mdotox  # sum flow from 3 types of orifice
-
-        # find current tank vapour parameters
-        Z2 = motor.Z2_solve(temp_ld, Z_ld, vmass_ld, vmass, gamma_N2O,
-                            zdat, pdat)
+        if status == reverse_flow:
+            print(f'FAILURE: Reverse flow occurred at t={time} s')
+            break
 
-        if Z2 == 'numerical instability':
+        if status == vapour_depleted:
             print('vapour depleted: finishing motor simulation')
             break
 
-        #isentropic assumption
-        temp = temp_ld * pow(Z2 * vmass / (Z_ld * vmass_ld), gamma_N2O-1)
-        vap_pres = vap_pres_ld * pow(temp / temp_ld, gamma_N2O / (gamma_N2O-1))
-        vden = vden_ld * pow(temp / temp_ld, 1 / (gamma_N2O-1))
-
-    # check for excessive mass flux
-    if mdotox / port.A > 600:
-        print(f'Failure: oxidizer flux too high: {mdotox / port.A:.2f}')
-        # break
-
-    # fuel port calculation
-    rdot = REG_COEFF * pow(mdotox/port.A, REG_EXP)
-    mdotfuel = rdot * DENSITY_FUEL * np.pi * port.d * port.l
-
-    port.d += 2*rdot*dt
-
-    if port.d > fuel.d: #check for depleted fuel grain
-        print("fuel depleted")
-        break
-
-    fuel_mass = (fuel.A - port.A) * port.l * DENSITY_FUEL
-
-
-    # lookup characteristic velocity using previous
-    # pres_cham and current OF from propep data
-    c_star = (motor.c_star_lookup(pres_cham, mdotox / mdotfuel, propep_data)
-              * C_STAR_EFFICIENCY)
-
-    # calculate current chamber pressure
-    pres_cham = (mdotox + mdotfuel) * c_star / throat.A
-
-    # lookup ratio of specific heats from propep data file
-    gamma = motor.gamma_lookup(pres_cham, mdotox/mdotfuel, propep_data)
-
-
-    # performance calculations
-    # find nozzle exit static pressure
-    mach_exit = motor.mach_exit(gamma, NOZZLE_AREA_RATIO)
-    pres_exit = pres_cham * pow(1 + (gamma - 1) * mach_exit * mach_exit * 0.5,
-                                -gamma / (gamma - 1))
-
-
-    # motor performance calculations
-    thrust = NOZZLE_EFFICIENCY * (
-        throat.A * pres_cham * np.sqrt(
-            2 * gamma**2 / (gamma - 1)
-            * pow(2 / (gamma + 1), (gamma + 1) / (gamma - 1))
-            * (1 - pow(pres_exit / pres_cham, 1 - 1 / gamma))
-        ) + (pres_exit - PRES_EXTERNAL) * throat.A * NOZZLE_AREA_RATIO)
-
-
-    #update data lists
-    time_data.append(time)
-    vap_pres_data.append(vap_pres)
-    pres_cham_data.append(pres_cham)
-    manifold_pres_data.append(manifold_pres)
-    thrust_data.append(thrust)
-    gox_data.append(mdotox / port.A)
-    prop_mass_data.append(lmass + vmass + fuel_mass)
-    gamma_data.append(gamma)
-    throat_data.append(DIA_THROAT)
-    nozzle_efficiency_data.append(NOZZLE_EFFICIENCY)
-    exit_pressure_data.append(pres_exit)
-    area_ratio_data.append(NOZZLE_AREA_RATIO)
-    of_data.append(mdotox/mdotfuel)
-    regression_data.append(rdot)
-    port_diameter_data.append(port.d)
-
-    #additional data for the 6DOF simulation
-    vmass_data.append(vmass)
-    vden_data.append(vden)
-    lden_data.append(lden)
-    lmass_data.append(lmass)
-    fuel_mass_data.append(fuel_mass)
+        # check for excessive mass flux
+        if gox > 600:
+            print(f'Failure: oxidizer flux too high: {gox:.2f}')
+            # break
 
+        if status == fuel_depleted:
+            print("fuel depleted")
+            break
 
+        fuel_mass = outputs.fuel_mass
 
-###############################################################################
-# Print and plot results
-###############################################################################
 
-#print final results
-print("\nFinal conditions:\ntime:", time, "s\ntank temperature:", temp-273.15,
-      "C\nlmass:", lmass, "kg\nvmass:", vmass, "kg\nvap_pres:", vap_pres,
-      'Pa\nfuel thickness:', (DIA_FUEL-port.d)/2, 'm\nfuel mass', fuel_mass,
-      'kg')
+        #update output data
+        if i == output_data.shape[1]:
+            output_data = np.concatenate(
+                (output_data, np.empty_like(output_data)), axis=1)
 
-impulse = dt * sum(thrust_data[:len(time_data)])
+        output_data[:, i] = (
+            time, vap_pres, pres_cham, outputs.thrust, gox,
+            lmass + vmass + fuel_mass, outputs.manifold_pres, outputs.gamma,
+            dia_throat, nozzle_efficiency, outputs.pres_exit,
+            nozzle_area_ratio, outputs.OF, outputs.rdot, port_d,
 
-print('\nPerformance results:\nInitial thrust:', thrust_data[int(0.5/dt)],
-      'N\nmean thrust:', np.mean(thrust_data), 'N\nimpulse:', impulse,
-      'Ns\nmean Isp:', impulse/(prop_mass_data[0]-fuel_mass)/9.81)
-print(
-f"""\n Midburn Results:
+            #additional data for the 6DOF simulation
+            vden, vmass, lden, lmass, fuel_mass
+        )
+        i += 1
+
+    (  # split output data into its quantities
+        time_data,
+        vap_pres_data,
+        pres_cham_data,
+        thrust_data,
+        gox_data,
+        prop_mass_data,
+        manifold_pres_data,
+        gamma_data,
+        throat_data,
+        nozzle_efficiency_data,
+        exit_pressure_data,
+        area_ratio_data,
+        of_data,
+        regression_data,
+        port_diameter_data,
+
+        # additional properties needed for the 6DOF simulation
+        vden_data, vmass_data,
+        lden_data, lmass_data,
+        fuel_mass_data
+    ) = output_data[:, :i]
+
+    ###########################################################################
+    # Print and plot results
+    ###########################################################################
+
+    #print final results
+    print("\nFinal conditions:\ntime:", time, "s\ntank temperature:",
+          temp-273.15, "C\nlmass:", lmass, "kg\nvmass:", vmass,
+          "kg\nvap_pres:", vap_pres, 'Pa\nfuel thickness:',
+          (DIA_FUEL-port_d)/2, 'm\nfuel mass', fuel_mass, 'kg')
+
+    impulse = dt * thrust_data.sum()
+
+    print('\nPerformance results:\nInitial thrust:', thrust_data[int(0.5/dt)],
+          'N\nmean thrust:', thrust_data.mean(), 'N\nimpulse:', impulse,
+          'Ns\nmean Isp:', impulse/(prop_mass_data[0]-fuel_mass)/9.81)
+    print(
+    f"""\n Midburn Results:
 O/F: {of_data[len(of_data) // 2]})
 Regression: {regression_data[len(regression_data) // 2]}
-Pressure margin: {np.min( ( np.array(manifold_pres_data) - np.array(pres_cham_data) ) / np.array(pres_cham_data) )}
+Pressure margin: {((manifold_pres_data - pres_cham_data) / pres_cham_data).min()}
 """)
 
-#plot pressures
-plt.figure(figsize=(8.5, 7))
-plt.subplot(221)
-plt.plot(time_data, vap_pres_data, 'C0', label='Tank pressure')
-plt.plot(time_data, pres_cham_data, 'C5', label='Chamber pressure')
-plt.plot(time_data, manifold_pres_data, 'C2', label='Injector manifold pressure')
-plt.ylabel('Pressure (Pa)')
-plt.ylim(0, max(vap_pres_data)*1.3)
-plt.xlabel('Time (s)')
-plt.ylabel('Pressure (Pa)')
-plt.legend()
-plt.tight_layout()
-
-#plot thrust
-plt.subplot(222)
-plt.plot(time_data, thrust_data)
-plt.xlabel('Time (s)')
-plt.ylabel('thrust (N)')
-plt.ylim(0, max(thrust_data)*1.3)
-plt.tight_layout()
-
-#plot massflux
-plt.subplot(223)
-plt.plot(time_data, gox_data, 'C6')
-plt.xlabel('Time (s)')
-plt.ylabel('Oxidizer mass flux ($kg s^{-1} m^{-2}$)')
-plt.ylim(0, max(gox_data)*1.3)
-plt.tight_layout()
-
-#plot O/F
-plt.subplot(224)
-plt.plot(time_data, of_data, 'C2')
-plt.xlabel('Time (s)')
-plt.ylabel('O/F Ratio')
-plt.ylim(0, max(of_data)*1.3)
-plt.tight_layout()
-
-plt.show()
-
-###############################################################################
-# generate motor_output.csv for trajectory simulation
-###############################################################################
-with open("motor_out.csv", "w", newline='') as motor_file:
-    motor_file.truncate()
-    motor_write = csv.writer(motor_file)
-    motor_write.writerow([
-        'Time',
-        'Propellant mass (kg)',
-        'Chamber pressure (Pa)',
-        'Throat diameter (m)',
-        'Nozzle inlet gamma',
-        'Nozzle efficiency',
-        'Exit static pressure (Pa)',
-        'Area ratio',
-        'Vapour Density (kg/m^3)',
-        'Vapour Mass (kg)',
-        'Liquid Density (kg/m^3)',
-        'Liquid Mass (kg)',
-        'Solid Fuel Mass (kg)',
-        'Solid Fuel Density (kg/m^3)',
-        'Solid Fuel Outer Diameter (m)',
-        'Solid Fuel Length (m)'
-    ])
-
-    for i, _ in enumerate(time_data):
-        motor_write.writerow([time_data[i], prop_mass_data[i],
-                              pres_cham_data[i],
-                              throat_data[i], gamma_data[i],
-                              nozzle_efficiency_data[i], exit_pressure_data[i],
-                              area_ratio_data[i],
-                              vden_data[i], vmass_data[i],
-                              lden_data[i], lmass_data[i], fuel_mass_data[i],
-                              DENSITY_FUEL, DIA_FUEL, LENGTH_PORT])
-
-    motor_write.writerow([time_data[-1] + dt, fuel_mass, pres_cham_data[-1],
-                          throat_data[-1], gamma_data[-1],
-                          nozzle_efficiency_data[-1], exit_pressure_data[-1],
-                          area_ratio_data[-1],
-                          vden_data[-1], 0,
-                          lden_data[-1], lmass_data[-1], fuel_mass_data[-1],
-                          DENSITY_FUEL, DIA_FUEL, LENGTH_PORT])
-
-
-###############################################################################
-# generate a RASP motor file for RAS Aero
-###############################################################################
-
-RASP_DIA = 160      # motor diameter in mm
-RASP_LENGTH = 3000  # motor length in mm
-RASP_DRY = 40       # motor dry mass in kg
-
-with open("hybrid.eng", "w+") as rasp_file:
-
-    rasp_file.write(';\n')
-    rasp_file.write(f'Pulsar {RASP_DIA} {RASP_LENGTH} P'
-                    f' {prop_mass_data[0]:.2f}'
-                    f' {prop_mass_data[0] + RASP_DRY:.2f} CUSF\n')
-
-    for i in range(31):
-        t = int(i * len(time_data) / 31)
-        rasp_file.write(
-                f'\t{float(time_data[t]):.2f} {float(thrust_data[t]):.2f}\n')
-
-    rasp_file.write(f'\t{float(time_data[-1]):.2f} 0.0\n')
-    rasp_file.write(';')
\ No newline at end of file
+    #plot pressures
+    plt.figure(figsize=(8.5, 7))
+    plt.subplot(221)
+    plt.plot(time_data, vap_pres_data, 'C0', label='Tank pressure')
+    plt.plot(time_data, pres_cham_data, 'C5', label='Chamber pressure')
+    plt.plot(time_data, manifold_pres_data, 'C2', label='Injector manifold pressure')
+    plt.ylabel('Pressure (Pa)')
+    plt.ylim(0, vap_pres_data.max()*1.3)
+    plt.xlabel('Time (s)')
+    plt.ylabel('Pressure (Pa)')
+    plt.legend()
+    plt.tight_layout()
+
+    #plot thrust
+    plt.subplot(222)
+    plt.plot(time_data, thrust_data)
+    plt.xlabel('Time (s)')
+    plt.ylabel('thrust (N)')
+    plt.ylim(0, thrust_data.max()*1.3)
+    plt.tight_layout()
+
+    #plot massflux
+    plt.subplot(223)
+    plt.plot(time_data, gox_data, 'C6')
+    plt.xlabel('Time (s)')
+    plt.ylabel('Oxidizer mass flux ($kg s^{-1} m^{-2}$)')
+    plt.ylim(0, gox_data.max()*1.3)
+    plt.tight_layout()
+
+    #plot O/F
+    plt.subplot(224)
+    plt.plot(time_data, of_data, 'C2')
+    plt.xlabel('Time (s)')
+    plt.ylabel('O/F Ratio')
+    plt.ylim(0, of_data.max()*1.3)
+    plt.tight_layout()
+
+    plt.show()
+
+    ###########################################################################
+    # generate motor_output.csv for trajectory simulation
+    ###########################################################################
+    motor_out = np.column_stack((
+        time_data, prop_mass_data, pres_cham_data,
+        throat_data, gamma_data,
+        nozzle_efficiency_data, exit_pressure_data,
+        area_ratio_data,
+        vden_data, vmass_data,
+        lden_data, lmass_data, fuel_mass_data,
+        np.full(len(time_data), DENSITY_FUEL),
+        np.full(len(time_data), DIA_FUEL),
+        np.full(len(time_data), LENGTH_PORT)
+    ))
+
+    motor_out = np.vstack((motor_out, [
+        time_data[-1] + dt, fuel_mass, pres_cham_data[-1],
+        throat_data[-1], gamma_data[-1],
+        nozzle_efficiency_data[-1], exit_pressure_data[-1],
+        area_ratio_data[-1],
+        vden_data[-1], 0,
+        lden_data[-1], lmass_data[-1], fuel_mass_data[-1],
+        DENSITY_FUEL, DIA_FUEL, LENGTH_PORT
+    ]))
+
+    np.savetxt("motor_out.csv", motor_out, fmt='%.8g', delimiter=',',
+               comments='', header=','.join([
+                   'Time',
+                   'Propellant mass (kg)',
+                   'Chamber pressure (Pa)',
+                   'Throat diameter (m)',
+                   'Nozzle inlet gamma',
+                   'Nozzle efficiency',
+                   'Exit static pressure (Pa)',
+                   'Area ratio',
+                   'Vapour Density (kg/m^3)',
+                   'Vapour Mass (kg)',
+                   'Liquid Density (kg/m^3)',
+                   'Liquid Mass (kg)',
+                   'Solid Fuel Mass (kg)',
+                   'Solid Fuel Density (kg/m^3)',
+                   'Solid Fuel Outer Diameter (m)',
+                   'Solid Fuel Length (m)'
+               ]))
+
+
+    ###########################################################################
+    # generate a RASP motor file for RAS Aero
+    ###########################################################################
+
+    RASP_DIA = 160      # motor diameter in mm
+    RASP_LENGTH = 3000  # motor length in mm
+    RASP_DRY = 40       # motor dry mass in kg
+
+    with open("hybrid.eng", "w+") as rasp_file:
+
+        rasp_file.write(';\n')
+        rasp_file.write(f'Pulsar {RASP_DIA} {RASP_LENGTH} P'
+                        f' {prop_mass_data[0]:.2f}'
+                        f' {prop_mass_data[0] + RASP_DRY:.2f} CUSF\n')
+
+        # 31 evenly spaced samples, the last one before the end of the burn
+        samples = np.arange(31) * len(time_data) // 31
+        rasp_file.write(''.join(
+            f'\t{t:.2f} {f:.2f}\n'
+            for t, f in zip(time_data[samples], thrust_data[samples])))
+
+        rasp_file.write(f'\t{time_data[-1]:.2f} 0.0\n')
+        rasp_file.write(';')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Checks that designs failing part way through a sweep are reported as
+such and leave the rest of the batch intact."""
+
+import numpy as np
+import hybrid_functions as motor
+import motor_sim
+
+
+state, params = motor_sim.setup()
+expected = np.array(motor.simulate(state, params))
+
+baseline = [getattr(motor_sim, name) for name in motor.SWEEP_COLUMNS]
+small_throat = baseline[:4] + [0.008]  # chamber pressure above propep data
+designs = np.array([baseline, small_throat, baseline, small_throat])
+
+# run twice, a failed design must not break the next sweep either
+for _ in range(2):
+    summary = motor.sweep(designs, state, params)
+
+    assert np.array_equal(summary[0], expected), summary[0]
+    assert np.array_equal(summary[2], expected), summary[2]
+
+    for row in summary[1::2]:
+        assert row[5] == motor.STEP_ERROR, row
+        assert np.isnan(row[:5]).all(), row
+
+print('sweep check passed')